@@ -1,13 +1,19 @@
 from flask import Flask, Response
 import cv2
 import numpy as np
-import requests
+import queue
 import time
-from threading import Thread, Lock
-from ultralytics import YOLO
+from threading import Thread
 from dotenv import load_dotenv
 import os
 from database import init_parking_spaces, insert_parking_event
+from detector import add_to_batch, detect_batch, pending_frames, CLASS_NAMES, MODEL_PATH, BACKEND
+from mjpeg import decode_jpeg, encode_jpeg, open_stream, iter_jpeg_frames
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 load_dotenv()
 
@@ -15,13 +21,22 @@ app = Flask(__name__)
 
 ESP32_IP = os.getenv("ESP32_IP")
 ESP32_STREAM_URL = os.getenv("ESP32_STREAM_URL")
+INFERENCE_CPUS = os.getenv("INFERENCE_CPUS")  # Optional comma-separated cores for capture + inference (Linux)
+
+# Parse the core list once; a malformed value is ignored rather than killing the stream thread
+INFERENCE_CPU_SET = None
+if INFERENCE_CPUS:
+    try:
+        INFERENCE_CPU_SET = {int(cpu) for cpu in INFERENCE_CPUS.split(",")}
+    except ValueError:
+        print(f"Ignoring INFERENCE_CPUS={INFERENCE_CPUS!r}: expected comma-separated core ids, e.g. 4,5,6,7")
 
-# Load YOLO model
-MODEL_PATH = "./ml_model/runs/detect/parking_detector/weights/best.pt"
-model = YOLO(MODEL_PATH)
+print(f"Model loaded: {MODEL_PATH} ({BACKEND})")
+print(f"Classes: {CLASS_NAMES}")
 
-print(f"Model loaded: {MODEL_PATH}")
-print(f"Classes: {model.names}")
+# Class lookups precomputed once so the per-frame path compares ints, not strings
+NAMES = tuple(CLASS_NAMES[i] for i in range(len(CLASS_NAMES)))
+CAR_CLASS_IDS = frozenset(i for i, name in CLASS_NAMES.items() if name.lower() in ('car', 'vehicle'))
 
 CONFIDENCE_THRESHOLD = 0.5
 
@@ -37,119 +52,174 @@ PARKING_ZONES = [
     [241, 141, 298, 226, 'A8'],
 ]
 
-parking_status = {}
-previous_parking_status = {}  # Track previous status for change detection
-latest_frame = None
+# Zones split into parallel arrays, indexed by zone id (0..7) everywhere per frame:
+# [x1, y1, x2, y2] for vectorized / compiled zone checks, names only for the DB and labels
+ZONE_XYXY = np.array([zone[:4] for zone in PARKING_ZONES], dtype=np.int32)
+ZONE_NAMES = tuple(zone[4] for zone in PARKING_ZONES)
+ZONE_RECTS = tuple(tuple(bounds) for bounds in ZONE_XYXY.tolist())  # Python ints for cv2 drawing calls
+NUM_ZONES = len(ZONE_NAMES)
+
+STATUS_DISPLAY = {'available': "Available", 'occupied': "Occupied", 'obstacle': "Obstacle"}
+ZONE_COLORS = {'available': (0, 255, 0), 'occupied': (0, 0, 255), 'obstacle': (0, 165, 255)}  # Green, red, orange (BGR)
+
+# Current status record per zone id, updated in place every analyzed frame
+parking_status = [
+    {"status": "available", "confidence": 0, "display": "Available", "label": None}
+    for _ in range(NUM_ZONES)
+]
+previous_parking_status = ["available"] * NUM_ZONES  # Last status per zone id, for change detection
+# (frame_id, annotated frame) published by process_stream. Replaced as a whole tuple, which is
+# atomic, so clients read it without a lock. frame_id lets clients skip re-encoding.
+latest_frame = (0, None)
 latest_detections = []  # Store latest detections for reuse
-frame_lock = Lock()
+zone_base = None  # Frame-sized image holding each zone's fill color
+zone_base_status = [None] * NUM_ZONES  # Status each zone is currently painted with in zone_base
 is_running = True
 PROCESS_EVERY_N_FRAMES = 3  # Process every 3rd frame for better performance
+event_queue = queue.Queue(maxsize=256)  # Parking events waiting to be written to the database
+
+# Motion gate: skip YOLO while the parking zones look the same as the last frame sent to it
+MOTION_SIZE = (80, 60)  # Grayscale thumbnail compared between frames
+MOTION_PIXEL_THRESHOLD = 25  # Gray level change for a thumbnail pixel to count as motion
+MOTION_MIN_PIXELS = 12  # Changed pixels inside the zones needed to run YOLO
+motion_reference = None  # Thumbnail of the last frame sent to YOLO
+motion_mask = None  # Thumbnail pixels covered by parking zones
+motion_mask_shape = None  # Frame shape motion_mask was computed for
 
 
-def check_parking_zone(detections, zone_coords):
+def zone_best_detections_numpy(det, zone_bounds):
     """
-    Check if there are detections within a parking zone
-    Returns: ('available', 'occupied', 'obstacle'), confidence, class_name
+    Find the most confident detection whose center is inside each zone (first one wins ties)
+    Returns: best confidence per zone (0 if none), best class id per zone (-1 if none)
     """
-    x1, y1, x2, y2 = zone_coords
+    det_center_x = (det[:, 0] + det[:, 2]) * 0.5
+    det_center_y = (det[:, 1] + det[:, 3]) * 0.5
     
-    best_detection = None
-    best_conf = 0
+    # (zones, detections) mask: detection center is inside parking zone
+    inside = (
+        (det_center_x[None, :] >= zone_bounds[:, 0, None]) & (det_center_x[None, :] <= zone_bounds[:, 2, None]) &
+        (det_center_y[None, :] >= zone_bounds[:, 1, None]) & (det_center_y[None, :] <= zone_bounds[:, 3, None])
+    )
     
-    # Check each detection
-    for detection in detections:
-        det_x1, det_y1, det_x2, det_y2 = detection[:4]
-        det_center_x = (det_x1 + det_x2) / 2
-        det_center_y = (det_y1 + det_y2) / 2
-        
-        # Check if detection center is inside parking zone
-        if (x1 <= det_center_x <= x2) and (y1 <= det_center_y <= y2):
-            conf = detection[4]
-            class_id = int(detection[5])
-            class_name = model.names[class_id]
-            
-            if conf > best_conf:
-                best_conf = conf
-                best_detection = (class_name, conf)
+    zone_confs = np.where(inside, det[None, :, 4], 0)
+    best = zone_confs.argmax(axis=1)
+    best_conf = zone_confs[np.arange(len(best)), best]
+    best_class = np.where(best_conf > 0, det[best, 5], -1).astype(np.int64)
+    return best_conf, best_class
+
+
+def zone_best_detections_loop(det, zone_bounds):
+    """Loop version of zone_best_detections_numpy, compiled with Numba when available"""
+    num_zones = zone_bounds.shape[0]
+    best_conf = np.zeros(num_zones, dtype=np.float32)
+    best_class = np.full(num_zones, -1, dtype=np.int64)
     
-    if best_detection and best_conf > CONFIDENCE_THRESHOLD:
-        class_name, conf = best_detection
-        
-        # Classify based on detected class
-        if class_name.lower() in ['car', 'vehicle']:
-            return 'occupied', conf, class_name
-        else:
-            return 'obstacle', conf, class_name
+    for zone_idx in range(num_zones):
+        x1 = zone_bounds[zone_idx, 0]
+        y1 = zone_bounds[zone_idx, 1]
+        x2 = zone_bounds[zone_idx, 2]
+        y2 = zone_bounds[zone_idx, 3]
+        for det_idx in range(det.shape[0]):
+            det_center_x = (det[det_idx, 0] + det[det_idx, 2]) * 0.5
+            det_center_y = (det[det_idx, 1] + det[det_idx, 3]) * 0.5
+            if x1 <= det_center_x <= x2 and y1 <= det_center_y <= y2 and det[det_idx, 4] > best_conf[zone_idx]:
+                best_conf[zone_idx] = det[det_idx, 4]
+                best_class[zone_idx] = int(det[det_idx, 5])
     
-    return 'available', 0, None
+    return best_conf, best_class
 
 
-def analyze_parking(frame):
-    """Run YOLO inference on full frame"""
-    global parking_status, previous_parking_status
-    
-    # Run YOLO detection
-    results = model(frame, verbose=False, conf=CONFIDENCE_THRESHOLD)
+if njit is not None:
+    # Compiled loops beat NumPy temporaries for 8 zones x a handful of detections
+    zone_best_detections = njit(cache=True)(zone_best_detections_loop)
+    # Compile now (or load from cache) so the first frame doesn't pay the JIT cost
+    zone_best_detections(np.zeros((1, 6), dtype=np.float32), ZONE_XYXY)
+else:
+    zone_best_detections = zone_best_detections_numpy
+
+
+def check_parking_zones(detections):
+    """
+    Check which detections fall within each parking zone, for all zones at once
+    Returns: list of (('available', 'occupied', 'obstacle'), confidence, class_name), one per zone
+    """
+    zone_results = [('available', 0, None)] * NUM_ZONES
+    if len(detections) == 0:
+        return zone_results
     
-    # Extract detections
-    detections = []
-    if len(results) > 0 and results[0].boxes is not None:
-        boxes = results[0].boxes
-        for box in boxes:
-            detections.append(box.data[0].cpu().numpy())
+    det = np.ascontiguousarray(detections, dtype=np.float32)
+    best_conf, best_class = zone_best_detections(det, ZONE_XYXY)
     
-    # Check each parking zone
-    temp_status = {}
-    for zone in PARKING_ZONES:
-        x1, y1, x2, y2, name = zone
-        
-        status, confidence, class_name = check_parking_zone(
-            detections, [x1, y1, x2, y2]
-        )
+    for zone_idx in np.flatnonzero(best_conf > CONFIDENCE_THRESHOLD):
+        conf = float(best_conf[zone_idx])
+        class_id = int(best_class[zone_idx])
+        class_name = NAMES[class_id]
         
-        if status == 'occupied':
-            display = "Occupied"
-        elif status == 'obstacle':
-            display = "Obstacle"
+        # Classify based on detected class
+        if class_id in CAR_CLASS_IDS:
+            zone_results[zone_idx] = ('occupied', conf, class_name)
         else:
-            display = "Available"
-        
-        temp_status[name] = {
-            "status": status,
-            "confidence": confidence,
-            "display": display,
-            "label": class_name
-        }
+            zone_results[zone_idx] = ('obstacle', conf, class_name)
     
-    # Detect status changes and insert database events
-    for space_name, current_info in temp_status.items():
-        current_status = current_info["status"]
-        previous_status = previous_parking_status.get(space_name, {}).get("status", "available")
+    return zone_results
+
+
+def analyze_parking():
+    """Run batched YOLO inference on the queued frames and update parking status for each, in order"""
+    # One (N, 6) array of [x1, y1, x2, y2, conf, class_id] per queued frame
+    batch_detections = detect_batch(CONFIDENCE_THRESHOLD)
+    
+    for detections in batch_detections:
+        update_parking_status(detections)
+    return batch_detections
+
+
+def update_parking_status(detections):
+    """Update parking zone status from one frame's detections and log changes"""
+    zone_results = check_parking_zones(detections)
+    for zone_idx, (status, confidence, class_name) in enumerate(zone_results):
+        # Update the zone's status record in place
+        status_info = parking_status[zone_idx]
+        status_info["status"] = status
+        status_info["confidence"] = confidence
+        status_info["display"] = STATUS_DISPLAY[status]
+        status_info["label"] = class_name
         
         # Only insert event if status has changed
-        if current_status != previous_status:
+        previous_status = previous_parking_status[zone_idx]
+        if status != previous_status:
+            name = ZONE_NAMES[zone_idx]
             is_car = None
-            if current_status == 'occupied':
+            if status == 'occupied':
                 is_car = True
-            elif current_status == 'obstacle':
+            elif status == 'obstacle':
                 is_car = False
             
-            # Insert the event to database
+            # Queue the event for the database worker (never block inference on MySQL)
             try:
-                insert_parking_event(space_name, current_status, previous_status, is_car)
-            except Exception as error:
-                print(f"Error inserting DB event for {space_name}: {error}")
-    
-    # Update status trackers
-    previous_parking_status = temp_status.copy()
-    parking_status.update(temp_status)
-    return detections
+                event_queue.put_nowait((name, status, previous_status, is_car))
+            except queue.Full:
+                print(f"DB event queue full, dropping event for {name}")
+            
+            previous_parking_status[zone_idx] = status
+
+
+def db_worker():
+    """Insert queued parking events into the database, off the inference thread"""
+    while True:
+        space_name, current_status, previous_status, is_car = event_queue.get()
+        try:
+            insert_parking_event(space_name, current_status, previous_status, is_car)
+        except Exception as error:
+            print(f"Error inserting DB event for {space_name}: {error}")
+        finally:
+            event_queue.task_done()
 
 
 def draw_detections(frame, detections=None):
-    """Draw YOLO detections and parking zones"""
-    annotated = frame.copy()
-    h, w = frame.shape[:2]
+    """Draw YOLO detections and parking zones onto the frame (in place)"""
+    global zone_base
+    annotated = frame
     
     # Draw YOLO bounding boxes (optional - for debugging)
     if detections is not None and len(detections) > 0:
@@ -157,7 +227,7 @@ def draw_detections(frame, detections=None):
             x1, y1, x2, y2 = map(int, detection[:4])
             conf = detection[4]
             class_id = int(detection[5])
-            class_name = model.names[class_id]
+            class_name = NAMES[class_id]
             
             # Draw detection box (purple for visibility)
             cv2.rectangle(annotated, (x1, y1), (x2, y2), (255, 0, 255), 2)
@@ -165,23 +235,29 @@ def draw_detections(frame, detections=None):
             cv2.putText(annotated, label, (x1, y1-5), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 0, 255), 1)
     
-    # Draw parking zones
-    for zone in PARKING_ZONES:
-        x1, y1, x2, y2, name = zone
-        status_info = parking_status.get(name, {"status": "available", "display": "Libre"})
+    # Zone fill colors live in zone_base; only repaint the zones whose status changed
+    if zone_base is None or zone_base.shape != annotated.shape:
+        zone_base = np.empty_like(annotated)
+        zone_base_status[:] = [None] * NUM_ZONES
+    
+    zone_styles = []
+    for zone_idx, (x1, y1, x2, y2) in enumerate(ZONE_RECTS):
+        status_info = parking_status[zone_idx]
+        color = ZONE_COLORS[status_info["status"]]
         
-        # Color based on status
-        if status_info["status"] == "occupied":
-            color = (0, 0, 255)  # Red
-        elif status_info["status"] == "obstacle":
-            color = (0, 165, 255)  # Orange
-        else:
-            color = (0, 255, 0)  # Green
+        if zone_base_status[zone_idx] != status_info["status"]:
+            zone_base[y1:y2 + 1, x1:x2 + 1] = color
+            zone_base_status[zone_idx] = status_info["status"]
         
-        # Draw semi-transparent overlay
-        overlay = annotated.copy()
-        cv2.rectangle(overlay, (x1, y1), (x2, y2), color, -1)
-        cv2.addWeighted(overlay, 0.3, annotated, 0.7, 0, annotated)
+        # Blend the semi-transparent fill in place, touching only the zone's pixels
+        roi = annotated[y1:y2 + 1, x1:x2 + 1]
+        cv2.addWeighted(zone_base[y1:y2 + 1, x1:x2 + 1], 0.3, roi, 0.7, 0, roi)
+        zone_styles.append((status_info, color))
+    
+    # Draw zone borders and labels
+    for zone_idx, (x1, y1, x2, y2) in enumerate(ZONE_RECTS):
+        status_info, color = zone_styles[zone_idx]
+        name = ZONE_NAMES[zone_idx]
         cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 2)
         
         # Label text
@@ -198,9 +274,9 @@ def draw_detections(frame, detections=None):
                    cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
     
     # Statistics
-    available = sum(1 for s in parking_status.values() if s["status"] == "available")
-    occupied = sum(1 for s in parking_status.values() if s["status"] == "occupied")
-    obstacles = sum(1 for s in parking_status.values() if s["status"] == "obstacle")
+    available = sum(1 for s in parking_status if s["status"] == "available")
+    occupied = sum(1 for s in parking_status if s["status"] == "occupied")
+    obstacles = sum(1 for s in parking_status if s["status"] == "obstacle")
     
     cv2.rectangle(annotated, (2, 2), (280, 25), (0, 0, 0), -1)
     stats_text = f"Available: {available} | Occupied: {occupied} | Obstacles: {obstacles}"
@@ -210,60 +286,97 @@ def draw_detections(frame, detections=None):
     return annotated
 
 
+def has_motion(frame):
+    """
+    Compare a small grayscale thumbnail of the frame against the last frame sent to YOLO
+    Returns: True if enough pixels changed inside the parking zones
+    """
+    global motion_reference, motion_mask, motion_mask_shape
+    
+    thumb = cv2.resize(frame, MOTION_SIZE, interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+    
+    # Zone mask in thumbnail pixels, only changes with the camera resolution
+    if motion_mask_shape != frame.shape:
+        h, w = frame.shape[:2]
+        scale = np.array([MOTION_SIZE[0] / w, MOTION_SIZE[1] / h] * 2, dtype=np.float32)
+        motion_mask = np.zeros((MOTION_SIZE[1], MOTION_SIZE[0]), dtype=bool)
+        for x1, y1, x2, y2 in (ZONE_XYXY * scale).astype(np.int32):
+            motion_mask[y1:y2 + 1, x1:x2 + 1] = True
+        motion_mask_shape = frame.shape
+        motion_reference = None
+    
+    if motion_reference is not None:
+        diff = cv2.absdiff(motion_reference, gray)
+        if np.count_nonzero((diff > MOTION_PIXEL_THRESHOLD) & motion_mask) < MOTION_MIN_PIXELS:
+            return False
+    
+    motion_reference = gray
+    return True
+
+
 def process_stream():
     """Capture and process ESP32 stream"""
     global latest_frame, latest_detections, is_running
     stream = None
-    bytes_data = bytes()
     frame_count = 0
     
+    # Keep capture + inference (and the threads YOLO spawns from here) on their own cores
+    if INFERENCE_CPU_SET and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, INFERENCE_CPU_SET)
+        except OSError as error:
+            print(f"Could not pin inference to cores {sorted(INFERENCE_CPU_SET)}, running unpinned: {error}")
+    
     while is_running:
         try:
             if stream is None:
                 print(f"Connecting to {ESP32_STREAM_URL}...")
-                stream = requests.get(ESP32_STREAM_URL, stream=True, timeout=10)
-                bytes_data = bytes()
+                stream = open_stream(ESP32_STREAM_URL, timeout=10)
                 print("Connected to ESP32")
             
-            for chunk in stream.iter_content(chunk_size=4096):
+            for jpg in iter_jpeg_frames(stream):
                 if not is_running:
                     break
-                    
-                bytes_data += chunk
-                a = bytes_data.find(b'\xff\xd8')
-                b = bytes_data.find(b'\xff\xd9')
                 
-                if a != -1 and b != -1:
-                    jpg = bytes_data[a:b+2]
-                    bytes_data = bytes_data[b+2:]
-                    frame = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), cv2.IMREAD_COLOR)
+                frame = decode_jpeg(jpg)
+                
+                if frame is not None:
+                    frame_count += 1
                     
-                    if frame is not None:
-                        frame_count += 1
-                        
-                        # Only run YOLO inference every Nth frame for better performance
-                        if frame_count % PROCESS_EVERY_N_FRAMES == 0:
-                            start_time = time.time()
-                            detections = analyze_parking(frame)
-                            latest_detections = detections  # Store for reuse
-                            inference_time = (time.time() - start_time) * 1000
-                            
-                            # Add FPS counter
-                            annotated_frame = draw_detections(frame, detections)
-                            fps_text = f"Inference: {inference_time:.0f}ms (every {PROCESS_EVERY_N_FRAMES} frames)"
-                            cv2.putText(annotated_frame, fps_text, (5, 40), 
-                                       cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+                    # Only queue every Nth frame for YOLO, and run it once a batch is full
+                    run_batch = False
+                    if frame_count % PROCESS_EVERY_N_FRAMES == 0:
+                        if has_motion(frame):
+                            run_batch = add_to_batch(frame)
                         else:
-                            # Reuse previous detections for faster rendering
-                            annotated_frame = draw_detections(frame, latest_detections)
-                            cv2.putText(annotated_frame, "Cached", (5, 40), 
-                                       cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+                            # Scene settled: flush a partially filled batch so zone status catches up
+                            run_batch = pending_frames() > 0
+                    
+                    if run_batch:
+                        start_time = time.time()
+                        batch_detections = analyze_parking()
+                        latest_detections = batch_detections[-1]  # Newest frame, store for reuse
+                        inference_time = (time.time() - start_time) * 1000
+                        
+                        # Add FPS counter
+                        annotated_frame = draw_detections(frame, latest_detections)
+                        fps_text = f"Inference: {inference_time:.0f}ms (batch of {len(batch_detections)}, every {PROCESS_EVERY_N_FRAMES} frames)"
+                        cv2.putText(annotated_frame, fps_text, (5, 40), 
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+                    else:
+                        # Reuse previous detections for faster rendering
+                        annotated_frame = draw_detections(frame, latest_detections)
+                        cv2.putText(annotated_frame, "Cached", (5, 40), 
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+                    
+                    # Publish a new tuple instead of mutating shared state; the frame is never drawn on again
+                    latest_frame = (latest_frame[0] + 1, annotated_frame)
                         
-                        with frame_lock:
-                            latest_frame = annotated_frame
-                            
         except Exception as error:
             print(f"Stream error: {error}")
+            if stream is not None:
+                stream.close()
             stream = None
             time.sleep(2)
 
@@ -271,18 +384,22 @@ def process_stream():
 def generate_frames():
     """Generate frames for web display"""
     global latest_frame
+    last_sent_id = None
+    cached_jpeg = None
     
     while True:
-        with frame_lock:
-            if latest_frame is None:
+        frame_id, frame = latest_frame
+        
+        # Only encode when process_stream produced a new frame since the last one sent
+        if frame_id != last_sent_id:
+            if frame is None:
                 frame = np.zeros((240, 320, 3), dtype=np.uint8)
                 cv2.putText(frame, "Waiting for ESP32...", (40, 120), 
                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-            else:
-                frame = latest_frame.copy()
+            cached_jpeg = encode_jpeg(frame)
+            last_sent_id = frame_id
         
-        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-        yield (b'--frame\r\n' b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+        yield (b'--frame\r\n' b'Content-Type: image/jpeg\r\n\r\n' + cached_jpeg + b'\r\n')
         time.sleep(0.033)
 
 
@@ -295,10 +412,10 @@ if __name__ == '__main__':
     print("\n" + "="*60)
     print("PARKING SYSTEM WITH YOLO")
     print("="*60)
-    print(f"\nModel: {MODEL_PATH}")
-    print(f"Classes: {model.names}")
+    print(f"\nModel: {MODEL_PATH} ({BACKEND})")
+    print(f"Classes: {CLASS_NAMES}")
     print(f"ESP32: {ESP32_IP}")
-    print(f"Zones: {len(PARKING_ZONES)}")
+    print(f"Zones: {NUM_ZONES}")
     print("="*60)
     
     # Initialize database parking spaces
@@ -308,18 +425,9 @@ if __name__ == '__main__':
     else:
         print("Could not connect to database")
     
-    # Initialize previous_parking_status with all spaces as 'available'
-    for zone in PARKING_ZONES:
-        space_name = zone[4]
-        previous_parking_status[space_name] = {
-            "status": "available",
-            "confidence": 0,
-            "display": "Available",
-            "label": None
-        }
-    
     print("="*60)
     
+    Thread(target=db_worker, daemon=True).start()
     Thread(target=process_stream, daemon=True).start()
     
     print(f"\nCamera feed: http://localhost:5000")
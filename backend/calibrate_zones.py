@@ -1,8 +1,7 @@
 import cv2
-import requests
-import numpy as np
 from dotenv import load_dotenv
 import os
+from mjpeg import decode_jpeg, open_stream, iter_jpeg_frames
 
 load_dotenv()
 
@@ -43,8 +42,7 @@ print("="*50 + "\n")
 
 try:
     print("Connecting...")
-    stream = requests.get(url, stream=True, timeout=10)
-    bytes_data = bytes()
+    stream = open_stream(url, timeout=10)
     
     window_name = "Zone Calibrator"
     cv2.namedWindow(window_name)
@@ -52,34 +50,25 @@ try:
     
     print("Connected - Draw the zones\n")
     
-    while True:
-        bytes_data += stream.raw.read(2048)
+    for jpg in iter_jpeg_frames(stream):
+        frame = decode_jpeg(jpg)
         
-        a = bytes_data.find(b'\xff\xd8')
-        b = bytes_data.find(b'\xff\xd9')
-        
-        if a != -1 and b != -1:
-            jpg = bytes_data[a:b+2]
-            bytes_data = bytes_data[b+2:]
+        if frame is not None:
+            display = frame.copy()
+            
+            for zone in zones:
+                cv2.rectangle(display, (zone[0], zone[1]), (zone[2], zone[3]), (0, 255, 0), 2)
+                cv2.putText(display, zone[4], (zone[0]+5, zone[1]+15), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
+            
+            if temp_rect:
+                cv2.rectangle(display, (temp_rect[0], temp_rect[1]), 
+                            (temp_rect[2], temp_rect[3]), (0, 0, 255), 2)
             
-            frame = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), cv2.IMREAD_COLOR)
+            cv2.putText(display, f"Zones: {len(zones)}", (10, 20), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 2)
             
-            if frame is not None:
-                display = frame.copy()
-                
-                for zone in zones:
-                    cv2.rectangle(display, (zone[0], zone[1]), (zone[2], zone[3]), (0, 255, 0), 2)
-                    cv2.putText(display, zone[4], (zone[0]+5, zone[1]+15), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
-                
-                if temp_rect:
-                    cv2.rectangle(display, (temp_rect[0], temp_rect[1]), 
-                                (temp_rect[2], temp_rect[3]), (0, 0, 255), 2)
-                
-                cv2.putText(display, f"Zones: {len(zones)}", (10, 20), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 2)
-                
-                cv2.imshow(window_name, display)
+            cv2.imshow(window_name, display)
         
         key = cv2.waitKey(1) & 0xFF
         if key == ord('q'):
@@ -95,6 +84,7 @@ try:
             zones = []
             print("Reset\n")
     
+    stream.close()
     cv2.destroyAllWindows()
     
 except Exception as error:
@@ -1,5 +1,5 @@
-import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from contextlib import contextmanager
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -14,72 +14,107 @@ DB_CONFIG = {
     'database': os.getenv('DB_NAME')
 }
 
+POOL_SIZE = 4
+
+# Connection pool shared by all database operations (created on first use)
+connection_pool = None
+
+
 def get_db_connection():
     """
-    Create and return a MySQL database connection.
+    Get a MySQL connection from the pool, creating the pool on first use.
+    Closing the connection returns it to the pool.
     Returns None if connection fails.
     """
+    global connection_pool
+    
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        if connection_pool is None:
+            connection_pool = pooling.MySQLConnectionPool(
+                pool_name='parking',
+                pool_size=POOL_SIZE,
+                **DB_CONFIG
+            )
+        connection = connection_pool.get_connection()
         if connection.is_connected():
             return connection
+        release_connection(connection)
+        return None
     except Error as error:
         print(f"Error connecting to MySQL: {error}")
         return None
 
 
-def init_parking_spaces():
+def release_connection(connection):
     """
-    Initialize parking space records in the database if they don't exist.
-    Creates records for spaces A1-A8 linked to section SEC-A.
+    Return a pooled connection to the pool, even if it dropped mid-query.
+    The pool takes the connection back either way and reconnects it on the next checkout.
     """
-    connection = get_db_connection()
+    try:
+        connection.close()
+    except Error as error:
+        print(f"Error releasing MySQL connection: {error}")
+
 
-    if not connection:
-        print("Failed to initialize parking spaces - no database connection")
-        return False
+@contextmanager
+def db_cursor():
+    """
+    Check a connection out of the pool and yield (connection, cursor), or (None, None) if unavailable.
+    The cursor is always closed and the connection always returned to the pool.
+    """
+    connection = get_db_connection()
+    if connection is None:
+        yield None, None
+        return
     
+    cursor = None
     try:
         cursor = connection.cursor()
+        yield connection, cursor
+    finally:
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Error:
+                pass
+        release_connection(connection)
+
+
+def init_parking_spaces():
+    """
+    Initialize parking space records in the database if they don't exist.
+    Creates records for spaces A1-A8 linked to section SEC-A.
+    """
+    with db_cursor() as (connection, cursor):
+        if not connection:
+            print("Failed to initialize parking spaces - no database connection")
+            return False
         
-        # Define the parking spaces for section A
-        parking_spaces = ['A1', 'A2', 'A3', 'A4', 'A5', 'A6', 'A7', 'A8']
-        section_id = 'SEC-A'
-        
-        for space_code in parking_spaces:
-            parking_space_id = f'PS-{space_code}'
+        try:
+            # Define the parking spaces for section A
+            parking_spaces = ['A1', 'A2', 'A3', 'A4', 'A5', 'A6', 'A7', 'A8']
+            section_id = 'SEC-A'
             
-            # Check if the parking space already exists
-            check_query = """
-                SELECT ParkingSpaceID FROM parkingspace 
-                WHERE ParkingSpaceID = %s
+            # Insert all missing parking space records in one round trip (only current state).
+            # Only duplicate keys are skipped; FK / data errors (e.g. missing section) still fail
+            rows = [(f'PS-{space_code}', section_id, space_code, 'available') for space_code in parking_spaces]
+            placeholders = ", ".join(["(%s, %s, %s, %s, NULL)"] * len(rows))
+            insert_query = f"""
+                INSERT INTO parkingspace 
+                (ParkingSpaceID, SectionID, SpaceCode, Status, CurrentOccupancyID)
+                VALUES {placeholders}
+                ON DUPLICATE KEY UPDATE ParkingSpaceID = ParkingSpaceID
             """
-            cursor.execute(check_query, (parking_space_id,))
-            existing = cursor.fetchone()
+            cursor.execute(insert_query, [value for row in rows for value in row])
+            print(f"Created {cursor.rowcount} new parking spaces")
             
-            if not existing:
-                # Insert new parking space record (only current state)
-                insert_query = """
-                    INSERT INTO parkingspace 
-                    (ParkingSpaceID, SectionID, SpaceCode, Status, CurrentOccupancyID)
-                    VALUES (%s, %s, %s, %s, NULL)
-                """
-                cursor.execute(insert_query, (parking_space_id, section_id, space_code, 'available'))
-                print(f"Created parking space: {space_code}")
-            else:
-                print(f"Parking space {space_code} already exists")
-        
-        connection.commit()
-        print(f"Initialized {len(parking_spaces)} parking spaces")
-        return True
-        
-    except Error as error:
-        print(f"Error initializing parking spaces: {error}")
-        return False
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+            connection.commit()
+            print(f"Initialized {len(parking_spaces)} parking spaces")
+            return True
+            
+        except Error as error:
+            print(f"Error initializing parking spaces: {error}")
+            return False
 
 
 def insert_parking_event(space_code, new_status, previous_status, is_car=None):
@@ -87,106 +122,100 @@ def insert_parking_event(space_code, new_status, previous_status, is_car=None):
     Insert a new parking event record when status changes.
     Updates ParkingSpace table with current status and inserts into OccupancyHistory.
     """
-    connection = get_db_connection()
-    
-    if not connection:
-        print(f"Failed to insert event for {space_code} - NO database connection")
-        return False
-    
-    try:
-        cursor = connection.cursor()
-        current_time = datetime.now()
-        parking_space_id = f"PS-{space_code}"
+    with db_cursor() as (connection, cursor):
+        if not connection:
+            print(f"Failed to insert event for {space_code} - NO database connection")
+            return False
         
-        # Handle different status transitions
-        if previous_status == 'available' and new_status in ['occupied', 'obstacle']:
-            # Vehicle/object entering: Create new occupancy record
-            timestamp_str = current_time.strftime('%Y%m%d%H%M%S%f')
-            occupancy_id = f"OCC-{space_code}-{timestamp_str}"
-            
-            # Insert into OccupancyHistory with TimeOfEntry
-            insert_history_query = """
-                INSERT INTO occupancyhistory 
-                (OccupancyID, ParkingSpaceID, TimeOfEntry, TimeOfDeparture, CheckIfObjectIsCar, DurationMinutes)
-                VALUES (%s, %s, %s, NULL, %s, NULL)
-            """
-            cursor.execute(insert_history_query, (occupancy_id, parking_space_id, current_time, is_car))
+        try:
+            current_time = datetime.now()
+            parking_space_id = f"PS-{space_code}"
             
-            # Update ParkingSpace with new status and current occupancy
-            update_space_query = """
-                UPDATE parkingspace 
-                SET Status = %s, CurrentOccupancyID = %s
-                WHERE ParkingSpaceID = %s
-            """
-            cursor.execute(update_space_query, (new_status, occupancy_id, parking_space_id))
-            
-            print(f"DB Event: {space_code} {previous_status}→{new_status} (Entry: {current_time.strftime('%H:%M:%S')})")
-            
-        elif previous_status in ['occupied', 'obstacle'] and new_status == 'available':
-            # Vehicle/object leaving: Update existing occupancy record
-            
-            # Get current occupancy ID
-            get_occupancy_query = """
-                SELECT CurrentOccupancyID FROM parkingspace 
-                WHERE ParkingSpaceID = %s
-            """
-            cursor.execute(get_occupancy_query, (parking_space_id,))
-            result = cursor.fetchone()
-            
-            if result and result[0]:
-                current_occupancy_id = result[0]
+            # Handle different status transitions
+            if previous_status == 'available' and new_status in ['occupied', 'obstacle']:
+                # Vehicle/object entering: Create new occupancy record
+                timestamp_str = current_time.strftime('%Y%m%d%H%M%S%f')
+                occupancy_id = f"OCC-{space_code}-{timestamp_str}"
+                
+                # Insert into OccupancyHistory with TimeOfEntry
+                insert_history_query = """
+                    INSERT INTO occupancyhistory 
+                    (OccupancyID, ParkingSpaceID, TimeOfEntry, TimeOfDeparture, CheckIfObjectIsCar, DurationMinutes)
+                    VALUES (%s, %s, %s, NULL, %s, NULL)
+                """
+                cursor.execute(insert_history_query, (occupancy_id, parking_space_id, current_time, is_car))
                 
-                # Get entry time to calculate duration
-                get_entry_query = """
-                    SELECT TimeOfEntry FROM occupancyhistory 
-                    WHERE OccupancyID = %s
+                # Update ParkingSpace with new status and current occupancy
+                update_space_query = """
+                    UPDATE parkingspace 
+                    SET Status = %s, CurrentOccupancyID = %s
+                    WHERE ParkingSpaceID = %s
                 """
-                cursor.execute(get_entry_query, (current_occupancy_id,))
-                entry_result = cursor.fetchone()
+                cursor.execute(update_space_query, (new_status, occupancy_id, parking_space_id))
                 
-                duration_minutes = None
-                if entry_result and entry_result[0]:
-                    entry_time = entry_result[0]
-                    duration = current_time - entry_time
-                    duration_minutes = int(duration.total_seconds() / 60)
+                print(f"DB Event: {space_code} {previous_status}→{new_status} (Entry: {current_time.strftime('%H:%M:%S')})")
                 
-                # Update OccupancyHistory with departure time and duration
-                update_history_query = """
-                    UPDATE occupancyhistory 
-                    SET TimeOfDeparture = %s, DurationMinutes = %s
-                    WHERE OccupancyID = %s
+            elif previous_status in ['occupied', 'obstacle'] and new_status == 'available':
+                # Vehicle/object leaving: Update existing occupancy record
+                
+                # Get current occupancy ID
+                get_occupancy_query = """
+                    SELECT CurrentOccupancyID FROM parkingspace 
+                    WHERE ParkingSpaceID = %s
                 """
-                cursor.execute(update_history_query, (current_time, duration_minutes, current_occupancy_id))
+                cursor.execute(get_occupancy_query, (parking_space_id,))
+                result = cursor.fetchone()
                 
-                print(f"DB Event: {space_code} {previous_status}→{new_status} (Departure: {current_time.strftime('%H:%M:%S')}, Duration: {duration_minutes}min)")
-            
-            # Update ParkingSpace to available and clear current occupancy
-            update_space_query = """
-                UPDATE parkingspace 
-                SET Status = %s, CurrentOccupancyID = NULL
-                WHERE ParkingSpaceID = %s
-            """
-            cursor.execute(update_space_query, (new_status, parking_space_id))
+                if result and result[0]:
+                    current_occupancy_id = result[0]
+                    
+                    # Get entry time to calculate duration
+                    get_entry_query = """
+                        SELECT TimeOfEntry FROM occupancyhistory 
+                        WHERE OccupancyID = %s
+                    """
+                    cursor.execute(get_entry_query, (current_occupancy_id,))
+                    entry_result = cursor.fetchone()
+                    
+                    duration_minutes = None
+                    if entry_result and entry_result[0]:
+                        entry_time = entry_result[0]
+                        duration = current_time - entry_time
+                        duration_minutes = int(duration.total_seconds() / 60)
+                    
+                    # Update OccupancyHistory with departure time and duration
+                    update_history_query = """
+                        UPDATE occupancyhistory 
+                        SET TimeOfDeparture = %s, DurationMinutes = %s
+                        WHERE OccupancyID = %s
+                    """
+                    cursor.execute(update_history_query, (current_time, duration_minutes, current_occupancy_id))
+                    
+                    print(f"DB Event: {space_code} {previous_status}→{new_status} (Departure: {current_time.strftime('%H:%M:%S')}, Duration: {duration_minutes}min)")
+                
+                # Update ParkingSpace to available and clear current occupancy
+                update_space_query = """
+                    UPDATE parkingspace 
+                    SET Status = %s, CurrentOccupancyID = NULL
+                    WHERE ParkingSpaceID = %s
+                """
+                cursor.execute(update_space_query, (new_status, parking_space_id))
+                
+            else:
+                # Status change without entry/departure (e.g., occupied → obstacle)
+                # Just update the status
+                update_space_query = """
+                    UPDATE parkingspace 
+                    SET Status = %s
+                    WHERE ParkingSpaceID = %s
+                """
+                cursor.execute(update_space_query, (new_status, parking_space_id))
+                
+                print(f"DB Event: {space_code} {previous_status}→{new_status}")
             
-        else:
-            # Status change without entry/departure (e.g., occupied → obstacle)
-            # Just update the status
-            update_space_query = """
-                UPDATE parkingspace 
-                SET Status = %s
-                WHERE ParkingSpaceID = %s
-            """
-            cursor.execute(update_space_query, (new_status, parking_space_id))
+            connection.commit()
+            return True
             
-            print(f"DB Event: {space_code} {previous_status}→{new_status}")
-        
-        connection.commit()
-        return True
-        
-    except Error as error:
-        print(f"Error inserting parking event for {space_code}: {error}")
-        return False
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
\ No newline at end of file
+        except Error as error:
+            print(f"Error inserting parking event for {space_code}: {error}")
+            return False
@@ -0,0 +1,320 @@
+import ast
+import json
+import os
+
+INFERENCE_THREADS = 4  # Intra-op threads for YOLO; more only adds sync overhead at 320x320
+# Must be set before torch / onnxruntime load their OpenMP runtime
+os.environ.setdefault("OMP_NUM_THREADS", str(INFERENCE_THREADS))
+
+import cv2
+import numpy as np
+import torch
+import torch.nn.functional as F
+from ultralytics import YOLO
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    import tensorrt as trt
+except ImportError:
+    trt = None
+
+WEIGHTS_DIR = "./ml_model/runs/detect/parking_detector/weights"
+ENGINE_PATH = os.path.join(WEIGHTS_DIR, "best.engine")
+ONNX_PATH = os.path.join(WEIGHTS_DIR, "best.onnx")
+ONNX_INT8_PATH = os.path.join(WEIGHTS_DIR, "best_int8.onnx")
+PT_PATH = os.path.join(WEIGHTS_DIR, "best.pt")
+
+IMG_SIZE = 320  # Must match training / export image size
+BATCH_SIZE = 4  # Frames per forward pass; static engine / ONNX exports override it with their own batch
+IOU_THRESHOLD = 0.7  # Same NMS threshold Ultralytics uses by default
+PAD_VALUE = 114 / 255  # Letterbox padding gray, same as Ultralytics
+
+# Keep YOLO from spawning one thread per core and fighting the capture, Flask and DB threads
+torch.set_num_threads(INFERENCE_THREADS)
+torch.set_num_interop_threads(1)
+cv2.setNumThreads(2)
+
+# Run the PyTorch / TensorRT backends on the GPU in FP16 when CUDA is available
+DEVICE = 0 if torch.cuda.is_available() else 'cpu'
+USE_HALF = torch.cuda.is_available()
+
+# Opt-in (TORCH_COMPILE=1): JIT-compile the PyTorch model with TorchInductor + CUDA graphs.
+# GPU only; on CPU compiling blocks startup and the fixed batch makes 1-frame flushes cost a full batch
+TORCH_COMPILE = os.getenv("TORCH_COMPILE") == "1" and hasattr(torch, "compile") and torch.cuda.is_available()
+
+# Preferred ONNX Runtime providers, in order (OpenVINO if the build includes it)
+ONNX_PROVIDERS = ['OpenVINOExecutionProvider', 'CPUExecutionProvider']
+
+
+def engine_batch_size(path):
+    """
+    Read the batch dimension of a TensorRT engine's input binding.
+    Returns None for dynamic-batch engines (or if TensorRT is unavailable).
+    """
+    if trt is None:
+        return None
+    with open(path, 'rb') as f, trt.Runtime(trt.Logger(trt.Logger.WARNING)) as runtime:
+        # Ultralytics prepends a length-prefixed JSON metadata block to the serialized engine
+        meta_len = int.from_bytes(f.read(4), byteorder='little')
+        try:
+            json.loads(f.read(meta_len).decode('utf-8'))
+        except (UnicodeDecodeError, ValueError):
+            f.seek(0)  # Plain engine without metadata
+        engine = runtime.deserialize_cuda_engine(f.read())
+    if hasattr(engine, 'num_io_tensors'):  # TensorRT >= 8.5
+        shape = engine.get_tensor_shape(engine.get_tensor_name(0))
+    else:
+        shape = engine.get_binding_shape(0)
+    return shape[0] if shape[0] > 0 else None
+
+
+model = None
+session = None
+input_name = None
+compiled = False  # True once the PyTorch model runs through torch.compile
+eager_model = None  # Original network, restored if the compiled one fails
+
+# Select backend: TensorRT engine > ONNX Runtime (CPU-only hosts) > PyTorch weights
+if os.path.exists(ENGINE_PATH):
+    MODEL_PATH = ENGINE_PATH
+    BACKEND = "tensorrt"
+elif ort is not None and not torch.cuda.is_available() and (
+        os.path.exists(ONNX_INT8_PATH) or os.path.exists(ONNX_PATH)):
+    MODEL_PATH = ONNX_INT8_PATH if os.path.exists(ONNX_INT8_PATH) else ONNX_PATH
+    BACKEND = "onnxruntime"
+else:
+    MODEL_PATH = PT_PATH
+    BACKEND = "pytorch"
+
+if BACKEND == "onnxruntime":
+    available = ort.get_available_providers()
+    providers = [p for p in ONNX_PROVIDERS if p in available]
+    session_options = ort.SessionOptions()
+    session_options.intra_op_num_threads = INFERENCE_THREADS
+    session_options.inter_op_num_threads = 1
+    session = ort.InferenceSession(MODEL_PATH, sess_options=session_options, providers=providers)
+    model_input = session.get_inputs()[0]
+    input_name = model_input.name
+    # Static ONNX exports have a fixed batch; follow it so batch-1 exports keep working
+    if isinstance(model_input.shape[0], int):
+        BATCH_SIZE = model_input.shape[0]
+    # Ultralytics stores class names in the ONNX metadata as a dict literal
+    CLASS_NAMES = ast.literal_eval(session.get_modelmeta().custom_metadata_map['names'])
+else:
+    if BACKEND == "tensorrt":
+        # The engine is fed the full input buffer, so it must match the engine's static batch
+        # (e.g. batch-1 engines from older exports)
+        BATCH_SIZE = engine_batch_size(MODEL_PATH) or BATCH_SIZE
+    model = YOLO(MODEL_PATH, task='detect')
+    CLASS_NAMES = model.names
+
+# Preprocess on the GPU when the model runs there: only the raw uint8 frame crosses PCIe
+GPU_PREPROCESS = BACKEND != "onnxruntime" and torch.cuda.is_available()
+
+# Pre-allocated network input (BATCH_SIZE, 3, 320, 320), reused for every batch
+if GPU_PREPROCESS:
+    input_buf = None
+    input_tensor = torch.full((BATCH_SIZE, 3, IMG_SIZE, IMG_SIZE), PAD_VALUE, device=DEVICE,
+                              dtype=torch.float16 if USE_HALF else torch.float32)
+    copy_stream = torch.cuda.Stream()  # Uploads + preprocessing, overlapped with decoding and compute
+else:
+    input_buf = np.full((BATCH_SIZE, 3, IMG_SIZE, IMG_SIZE), PAD_VALUE, dtype=np.float32)
+    input_tensor = torch.from_numpy(input_buf)  # Shares memory with input_buf
+    copy_stream = None
+pinned_frames = None  # Page-locked uint8 staging frame per batch slot (GPU preprocessing)
+resize_buf = None  # Resized frame before it is copied into input_buf (CPU preprocessing)
+letterbox_shape = None  # Frame shape the letterbox parameters were computed for
+letterbox_params = None  # (ratio, pad_x, pad_y)
+letterbox_size = None  # (new_w, new_h) of the resized frame inside the padded input
+batch_frames = []  # (frame_shape, letterbox_params) of each frame queued in input_tensor
+
+
+def letterbox(frame, slot=0):
+    """
+    Write frame into input_tensor[slot] as normalized RGB CHW, keeping aspect ratio.
+    Returns the scale factor and (pad_x, pad_y) needed to map boxes back.
+    """
+    global letterbox_shape, letterbox_params, letterbox_size, resize_buf, pinned_frames
+
+    # Scale factors and buffers only change with the camera resolution
+    if letterbox_shape != frame.shape:
+        h, w = frame.shape[:2]
+        ratio = min(IMG_SIZE / h, IMG_SIZE / w)
+        new_w, new_h = round(w * ratio), round(h * ratio)
+        pad_x, pad_y = (IMG_SIZE - new_w) // 2, (IMG_SIZE - new_h) // 2
+        letterbox_params = (ratio, pad_x, pad_y)
+        letterbox_size = (new_w, new_h)
+        if GPU_PREPROCESS:
+            pinned_frames = [torch.empty(frame.shape, dtype=torch.uint8).pin_memory() for _ in range(BATCH_SIZE)]
+        else:
+            resize_buf = np.empty((new_h, new_w, 3), dtype=np.uint8)
+        input_tensor.fill_(PAD_VALUE)
+        letterbox_shape = frame.shape
+
+    ratio, pad_x, pad_y = letterbox_params
+    new_w, new_h = letterbox_size
+
+    if GPU_PREPROCESS:
+        # Stage in pinned memory so the upload is an async DMA; each slot has its own
+        # staging frame, so a queued copy is never overwritten before detect_batch() syncs
+        staging = pinned_frames[slot]
+        np.copyto(staging.numpy(), frame)
+        with torch.cuda.stream(copy_stream):
+            # Don't overwrite input_tensor while the previous batch may still be reading it
+            copy_stream.wait_stream(torch.cuda.default_stream())
+            # Upload uint8 HWC, then BGR -> RGB, HWC -> CHW, bilinear resize and /255 on the GPU
+            frame_gpu = staging.to(DEVICE, non_blocking=True)
+            rgb_chw = frame_gpu.permute(2, 0, 1).flip(0).unsqueeze(0).float()
+            resized = F.interpolate(rgb_chw, size=(new_h, new_w), mode='bilinear', align_corners=False)
+            input_tensor[slot, :, pad_y:pad_y + new_h, pad_x:pad_x + new_w] = resized[0] / 255
+    else:
+        cv2.resize(frame, (new_w, new_h), dst=resize_buf, interpolation=cv2.INTER_LINEAR)
+        # BGR -> RGB, HWC -> CHW, /255 straight into the pre-allocated buffer
+        rgb_chw = resize_buf[:, :, ::-1].transpose(2, 0, 1)
+        np.multiply(rgb_chw, 1 / 255, out=input_buf[slot, :, pad_y:pad_y + new_h, pad_x:pad_x + new_w])
+
+    return letterbox_params
+
+
+def scale_boxes(detections, frame_shape, ratio, pad_x, pad_y):
+    """Map [x1, y1, x2, y2] from letterboxed input pixels back to frame pixels (in place)"""
+    h, w = frame_shape[:2]
+    detections[:, [0, 2]] = np.clip((detections[:, [0, 2]] - pad_x) / ratio, 0, w)
+    detections[:, [1, 3]] = np.clip((detections[:, [1, 3]] - pad_y) / ratio, 0, h)
+    return detections
+
+
+def decode_onnx_output(output, conf):
+    """Decode one raw YOLOv8 output (4 + num_classes, num_anchors) into (N, 6) detections"""
+    scores = output[4:]
+    class_ids = scores.argmax(0)
+    confs = scores.max(0)
+
+    keep = confs > conf
+    if not keep.any():
+        return np.empty((0, 6), dtype=np.float32)
+
+    cx, cy, bw, bh = output[:4, keep]
+    confs = confs[keep]
+    class_ids = class_ids[keep]
+
+    # Class-aware NMS, like Ultralytics
+    boxes_xywh = np.stack([cx - bw / 2, cy - bh / 2, bw, bh], axis=1)
+    indices = cv2.dnn.NMSBoxesBatched(boxes_xywh, confs, class_ids.astype(np.int32), conf, IOU_THRESHOLD)
+    indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+
+    detections = np.empty((len(indices), 6), dtype=np.float32)
+    detections[:, 0] = cx[indices] - bw[indices] / 2
+    detections[:, 1] = cy[indices] - bh[indices] / 2
+    detections[:, 2] = cx[indices] + bw[indices] / 2
+    detections[:, 3] = cy[indices] + bh[indices] / 2
+    detections[:, 4] = confs[indices]
+    detections[:, 5] = class_ids[indices]
+    return detections
+
+
+def add_to_batch(frame):
+    """
+    Letterbox a BGR frame into the next free batch slot.
+    Returns True once the batch is full and ready for detect_batch().
+    """
+    params = letterbox(frame, len(batch_frames))
+    batch_frames.append((frame.shape, params))
+    return len(batch_frames) >= BATCH_SIZE
+
+
+def pending_frames():
+    """Number of frames queued for the next detect_batch()"""
+    return len(batch_frames)
+
+
+def detect_batch(conf):
+    """
+    Run one YOLO forward pass over the queued frames and clear the batch.
+    Returns a list with an (N, 6) array of [x1, y1, x2, y2, confidence, class_id]
+    in frame pixels for each queued frame, in the order they were added.
+    """
+    count = len(batch_frames)
+
+    if session is not None:
+        # Static ONNX input: always feed the full buffer, ignore unused slots
+        outputs = session.run(None, {input_name: input_buf})[0]
+        batch_detections = [decode_onnx_output(outputs[i], conf) for i in range(count)]
+    else:
+        # Compute must see the uploads queued on copy_stream
+        if copy_stream is not None:
+            torch.cuda.default_stream().wait_stream(copy_stream)
+        # Compile on the first real batch, i.e. on the inference thread (CUDA graphs are per thread)
+        if TORCH_COMPILE and BACKEND == "pytorch" and eager_model is None:
+            compile_model()
+        # Tensor input skips Ultralytics' own resize/normalize (already done by letterbox).
+        # TensorRT engines and compiled models have a fixed batch, so they always get the full buffer.
+        batch_input = input_tensor if BACKEND == "tensorrt" or compiled else input_tensor[:count]
+        try:
+            results = model(batch_input, verbose=False, conf=conf, imgsz=IMG_SIZE,
+                            half=USE_HALF, device=DEVICE)
+        except Exception as error:
+            if not compiled:
+                raise
+            print(f"torch.compile failed, using eager PyTorch: {error}")
+            use_eager_model()
+            results = model(input_tensor[:count], verbose=False, conf=conf, imgsz=IMG_SIZE,
+                            half=USE_HALF, device=DEVICE)
+        batch_detections = []
+        for result in results[:count]:
+            if result.boxes is not None:
+                batch_detections.append(result.boxes.data.cpu().numpy())
+            else:
+                batch_detections.append(np.empty((0, 6), dtype=np.float32))
+
+    for detections, (frame_shape, params) in zip(batch_detections, batch_frames):
+        scale_boxes(detections, frame_shape, *params)
+
+    batch_frames.clear()
+    return batch_detections
+
+
+def warmup():
+    """Run one inference on the blank input so kernels and workspaces are ready before the first frame"""
+    if session is not None:
+        session.run(None, {input_name: input_buf})
+    else:
+        model(input_tensor, verbose=False, imgsz=IMG_SIZE, half=USE_HALF, device=DEVICE)
+
+
+def compile_model():
+    """
+    Swap the network inside the Ultralytics predictor for a torch.compile'd one.
+    Must run after warmup(), which builds the predictor and fuses the layers, and on
+    the thread that runs inference, since CUDA graphs are recorded per thread.
+    Falls back to eager PyTorch if compilation fails (e.g. no C++ compiler / Triton).
+    """
+    global compiled, eager_model
+    backend_model = model.predictor.model
+    eager_model = backend_model.model
+
+    # Fixed input shape, so CUDA graphs can replay the whole forward on the GPU
+    backend_model.model = torch.compile(eager_model, mode='reduce-overhead', dynamic=False)
+    compiled = True
+    print("Compiling model with torch.compile (the stream pauses until it finishes)...")
+    try:
+        # Compilation happens on the first call; run it twice so CUDA graphs get recorded too
+        warmup()
+        warmup()
+    except Exception as error:
+        print(f"torch.compile failed, using eager PyTorch: {error}")
+        use_eager_model()
+
+
+def use_eager_model():
+    """Put the original (uncompiled) network back into the Ultralytics predictor"""
+    global compiled
+    model.predictor.model.model = eager_model
+    compiled = False
+
+
+warmup()
@@ -0,0 +1,102 @@
+import socket
+from urllib.parse import urlsplit
+import cv2
+import numpy as np
+
+# libjpeg-turbo (SIMD) codec; falls back to OpenCV when the library is missing
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    turbo_jpeg = None
+
+JPEG_SOI = b'\xff\xd8'  # Start of image marker
+JPEG_EOI = b'\xff\xd9'  # End of image marker
+READ_SIZE = 64 * 1024  # Max bytes per socket read
+BUFFER_SIZE = 256 * 1024  # Stream buffer, about 2x the largest (SVGA) ESP32 frame
+JPEG_QUALITY = 70  # Quality of the re-encoded frames sent to the browser
+
+
+def decode_jpeg(jpg):
+    """
+    Decode a JPEG frame into a BGR image.
+    Returns None if the data can't be decoded.
+    """
+    if turbo_jpeg is not None:
+        try:
+            return turbo_jpeg.decode(jpg, pixel_format=TJPF_BGR)
+        except OSError:
+            return None
+
+    return cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def encode_jpeg(frame, quality=JPEG_QUALITY):
+    """Encode a BGR image as JPEG bytes"""
+    if turbo_jpeg is not None:
+        return turbo_jpeg.encode(frame, quality=quality, pixel_format=TJPF_BGR)
+    
+    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes()
+
+
+def open_stream(url, timeout=10):
+    """
+    Connect to an MJPEG stream over a plain socket and send the GET request.
+    Returns the connected socket.
+    """
+    parsed = urlsplit(url)
+    path = parsed.path or "/"
+    if parsed.query:
+        path += f"?{parsed.query}"
+    
+    sock = socket.create_connection((parsed.hostname, parsed.port or 80), timeout=timeout)
+    sock.sendall(f"GET {path} HTTP/1.1\r\nHost: {parsed.netloc}\r\n\r\n".encode())
+    return sock
+
+
+def iter_jpeg_frames(sock):
+    """
+    Yield the newest complete JPEG (SOI..EOI) received on an MJPEG stream socket.
+    Older frames that piled up while the consumer was busy are dropped.
+    Frames are memoryviews into a reused buffer, only valid until the next iteration.
+    Raises ConnectionError when the stream closes.
+    """
+    buf = bytearray(BUFFER_SIZE)
+    view = memoryview(buf)
+    write_pos = 0
+    
+    while True:
+        # Buffer full without a complete frame: drop it and start over
+        if write_pos == BUFFER_SIZE:
+            write_pos = 0
+        
+        received = sock.recv_into(view[write_pos:], min(READ_SIZE, BUFFER_SIZE - write_pos))
+        if received == 0:
+            raise ConnectionError("Stream closed by ESP32")
+        write_pos += received
+        
+        # Find the last complete frame in the buffer (HTTP/multipart headers are skipped)
+        start = 0
+        newest = None
+        while True:
+            soi = buf.find(JPEG_SOI, start, write_pos)
+            if soi == -1:
+                # Keep a trailing 0xff in case it is the first half of the next marker
+                start = max(start, write_pos - 1)
+                break
+            eoi = buf.find(JPEG_EOI, soi + 2, write_pos)
+            if eoi == -1:
+                start = soi
+                break
+            newest = (soi, eoi + 2)
+            start = eoi + 2
+        
+        if newest is not None:
+            yield view[newest[0]:newest[1]]
+        
+        # Slide the unfinished frame to the front instead of concatenating
+        if start > 0:
+            remaining = write_pos - start
+            buf[:remaining] = bytes(view[start:write_pos])
+            write_pos = remaining
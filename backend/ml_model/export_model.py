@@ -0,0 +1,146 @@
+from ultralytics import YOLO
+import torch
+import cv2
+import numpy as np
+import glob
+import os
+import sys
+
+# Usage:
+#   python export_model.py                 -> TensorRT FP16 engine (NVIDIA GPU)
+#   python export_model.py --int8          -> TensorRT INT8 engine (calibrated on the ESP32 dataset)
+#   python export_model.py --onnx          -> ONNX model for ONNX Runtime / OpenVINO (CPU)
+#   python export_model.py --onnx --int8   -> ONNX model + statically quantized INT8 copy
+
+weights_path = "./runs/detect/parking_detector/weights/best.pt"
+data_yaml = "./parking-dataset/data.yaml"
+calib_images = "./parking-dataset/images/train"
+use_int8 = "--int8" in sys.argv
+use_onnx = "--onnx" in sys.argv
+
+IMG_SIZE = 320  # Must match training image size
+BATCH_SIZE = 4  # Must match BATCH_SIZE in detector.py
+CALIB_LIMIT = 300  # Number of ESP32 frames used for INT8 calibration
+
+
+def preprocess(image_path):
+    """Letterbox an image to IMG_SIZE as normalized RGB NCHW (same as detector.py)"""
+    frame = cv2.imread(image_path)
+    h, w = frame.shape[:2]
+    ratio = min(IMG_SIZE / h, IMG_SIZE / w)
+    new_w, new_h = round(w * ratio), round(h * ratio)
+    pad_x, pad_y = (IMG_SIZE - new_w) // 2, (IMG_SIZE - new_h) // 2
+
+    tensor = np.full((1, 3, IMG_SIZE, IMG_SIZE), 114 / 255, dtype=np.float32)
+    resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    tensor[0, :, pad_y:pad_y + new_h, pad_x:pad_x + new_w] = resized[:, :, ::-1].transpose(2, 0, 1) / 255
+    return tensor
+
+
+def quantize_onnx(onnx_path):
+    """Statically quantize the ONNX model to INT8 using ESP32 frames for calibration"""
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationDataReader, QuantType, quantize_static
+
+    class ESP32CalibrationReader(CalibrationDataReader):
+        def __init__(self, input_name, image_paths):
+            self.input_name = input_name
+            # The ONNX input has a fixed batch, so calibrate on full batches only
+            self.batches = iter([
+                image_paths[i:i + BATCH_SIZE]
+                for i in range(0, len(image_paths) - BATCH_SIZE + 1, BATCH_SIZE)
+            ])
+
+        def get_next(self):
+            batch_paths = next(self.batches, None)
+            if batch_paths is None:
+                return None
+            return {self.input_name: np.concatenate([preprocess(path) for path in batch_paths])}
+
+    image_paths = sorted(glob.glob(os.path.join(calib_images, "*.jpg")))[:CALIB_LIMIT]
+    if not image_paths:
+        raise FileNotFoundError(f"No calibration images found in {calib_images}")
+
+    input_name = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+
+    int8_path = onnx_path.replace(".onnx", "_int8.onnx")
+    print(f"Calibrating with {len(image_paths)} ESP32 frames...")
+    quantize_static(
+        onnx_path,
+        int8_path,
+        ESP32CalibrationReader(input_name, image_paths),
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+    return int8_path
+
+
+# Check system
+print(f"\nPyTorch version: {torch.__version__}")
+print(f"CUDA available: {torch.cuda.is_available()}")
+if not use_onnx and not torch.cuda.is_available():
+    print("\n ERROR: TensorRT export requires an NVIDIA GPU with CUDA")
+    print("Use --onnx to export for CPU inference instead")
+    exit(1)
+
+# Verify trained weights
+if not os.path.exists(weights_path):
+    print(f"\n ERROR: {weights_path} not found!")
+    print("Train the model first with train_yolo_model.py")
+    exit(1)
+
+if use_int8 and not use_onnx and not os.path.exists(data_yaml):
+    print(f"\n ERROR: {data_yaml} not found!")
+    print("INT8 calibration needs the ESP32 frames listed in data.yaml")
+    exit(1)
+
+print(f"\nLoading trained model: {weights_path}")
+model = YOLO(weights_path)
+
+target = "ONNX" if use_onnx else "TENSORRT"
+if use_int8:
+    precision = "INT8"
+else:
+    precision = "FP32" if use_onnx else "FP16"
+print(f"EXPORTING TO {target} ({precision})...")
+print("\nThis may take a few minutes\n")
+
+try:
+    if use_onnx:
+        exported_path = model.export(
+            format='onnx',
+            imgsz=IMG_SIZE,       # Must match training image size
+            opset=13,
+            simplify=True,
+            dynamic=False,        # Fixed 4x3x320x320 input
+            batch=BATCH_SIZE,     # Frames per forward pass in app.py
+        )
+        if use_int8:
+            exported_path = quantize_onnx(exported_path)
+    else:
+        export_args = dict(
+            format='engine',
+            imgsz=IMG_SIZE,       # Must match training image size
+            batch=BATCH_SIZE,     # Frames per forward pass in app.py
+            device=0,             # Engines are built for the local GPU
+            half=not use_int8,    # FP16 tensor-core kernels
+        )
+        if use_int8:
+            export_args.update(
+                int8=True,        # INT8 kernels
+                data=data_yaml,   # Calibration images (ESP32 captures)
+            )
+        exported_path = model.export(**export_args)
+
+    print("EXPORT COMPLETED SUCCESSFULLY!")
+    print(f"\n Model saved at:")
+    print(f"   {os.path.abspath(exported_path)}")
+    print("\n app.py will load it automatically on next start")
+
+except Exception as error:
+    print(f"\n ERROR during export: {error}")
+    print("\nTroubleshooting:")
+    print("  - If TensorRT is missing: pip install tensorrt")
+    print("  - If ONNX Runtime is missing: pip install onnxruntime")
+    print("  - If path error: Check data.yaml has correct absolute path")
+    print("  - Engines are GPU-specific: re-export on each deployment machine")
@@ -71,6 +71,10 @@ try:
     print(f"\n Best model saved at:")
     print(f"   {os.path.abspath(best_model_path)}")
     
+    print("\n Export for faster inference in app.py:")
+    print("   - CPU-only hosts (ONNX Runtime / OpenVINO): python export_model.py --onnx")
+    print("   - NVIDIA GPU (TensorRT): python export_model.py")
+    
     print(f"\n Training results saved at:")
     print(f"   {os.path.abspath('./runs/detect/parking_detector/')}")
     
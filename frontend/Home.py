@@ -1,11 +1,19 @@
 import streamlit as st
-import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
+import io
 import os
 import sys
 import time
+from collections import Counter
+from contextlib import contextmanager
+import numpy as np
+from threading import Lock
 from dotenv import load_dotenv
+import matplotlib
+matplotlib.use("Agg")  # Render off-screen only, no GUI backend probing
 import matplotlib.pyplot as plt
+from matplotlib.patches import Patch
 from datetime import datetime, timedelta
 
 root_dir = os.path.join(os.path.dirname(__file__), '..')
@@ -22,13 +30,47 @@ DB_CONFIG = {
     'database': os.getenv('DB_NAME')
 }
 
+# Validate the database settings once instead of on every query
+MISSING_CONFIGS = [k for k, v in DB_CONFIG.items() if not v]
+CONFIG_ERROR = f"Configuración de base de datos faltante: {', '.join(MISSING_CONFIGS)}." if MISSING_CONFIGS else None
+
+POOL_SIZE = 10  # Connections shared by all dashboard sessions (mysql-connector allows up to 32)
+POOL_WAIT_SECONDS = 3  # How long a query waits for a free pooled connection before failing
+LIVE_REFRESH_SECONDS = 5  # How often the live status section re-runs
+PARKING_CACHE_TTL = 5  # Seconds live parking status is reused between refreshes
+PEAK_HOURS_CACHE_TTL = 3600  # Seconds hourly aggregates are reused (they change at most hourly)
+CHART_DPI = 90  # Resolution of the peak hours chart PNG
+
+# Card text, CSS class and icon per parking space status
+STATUS_INFO = {
+    'available': ('Disponible', 'available', '✅'),
+    'occupied': ('Ocupado', 'occupied', '🚗'),
+    'obstacle': ('Obstáculo', 'obstacle', '⚠️')
+}
+UNKNOWN_STATUS_INFO = ('Desconocido', 'available', '❓')
+
+CARD_TMPL = """
+        <div class="parking-card {css_class}">
+            <div style="font-size: 2em;">{icon}</div>
+            <div style="font-size: 1.5em; margin: 10px 0;">{space_code}</div>
+            <div>{display_text}</div>
+        </div>"""
+
+EMPTY_METRICS = {
+    'total': 0,
+    'available': 0,
+    'occupied': 0,
+    'obstacles': 0,
+    'occupancy_rate': 0
+}
+
 st.set_page_config(
     page_title="AtlasGrid",
     layout="wide",
     initial_sidebar_state="collapsed"
 )
 
-st.markdown("""
+CSS_BLOCK = """
 <style>
     .main-title {
         text-align: center;
@@ -63,6 +105,12 @@ st.markdown("""
         color: white;
     }
     
+    .parking-grid {
+        display: grid;
+        grid-template-columns: repeat(4, 1fr);
+        gap: 10px;
+    }
+    
     [data-testid="stMetricValue"] {
         font-size: 2.5em;
     }
@@ -75,188 +123,244 @@ st.markdown("""
         color: #333;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+
+@st.cache_resource
+def inject_css():
+    """
+    Inject the dashboard styles once.
+    Streamlit replays the cached markdown element on later runs instead of executing this again.
+    """
+    st.markdown(CSS_BLOCK, unsafe_allow_html=True)
+
+
+@st.cache_resource
+def get_connection_pool():
+    """
+    Create the MySQL connection pool once per server process.
+    Streamlit re-runs this script on every refresh, so a module-level pool would be rebuilt each time.
+    """
+    return pooling.MySQLConnectionPool(
+        pool_name="atlasgrid",
+        pool_size=POOL_SIZE,
+        pool_reset_session=False,
+        use_pure=False,  # C extension: result rows are decoded in C instead of Python
+        **DB_CONFIG
+    )
+
+
+@contextmanager
+def db_conn():
+    """
+    Check a connection out of the pool and always return it, even if a query fails.
+    The pool raises PoolError at once when every connection is busy, so back off and retry
+    for up to POOL_WAIT_SECONDS while other sessions' queries finish.
+    """
+    pool = get_connection_pool()
+    deadline = time.monotonic() + POOL_WAIT_SECONDS
+    delay = 0.05
+    while True:
+        try:
+            connection = pool.get_connection()
+            break
+        except PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+    try:
+        yield connection
+    finally:
+        connection.close()
 
 
+@st.cache_data(ttl=PEAK_HOURS_CACHE_TTL, show_spinner=False)
 def get_peak_hours_data(start_date, end_date):
     """
     Query the database to get hourly occupancy data for a specified date range.
     Filters to business hours only (7 AM - 10 PM).
+    Returns the hours, average occupancy per hour, indices of the top 3 peak hours
+    and an error message (None if successful).
     """
     try:
-        missing_configs = [k for k, v in DB_CONFIG.items() if not v]
-        if missing_configs:
-            return None, None, f"Configuración de base de datos faltante: {', '.join(missing_configs)}."
+        if CONFIG_ERROR:
+            return None, None, None, CONFIG_ERROR
         
-        connection = mysql.connector.connect(**DB_CONFIG)
+        days_in_range = (end_date - start_date).days + 1
+        if days_in_range < 1:
+            days_in_range = 1
         
-        if connection.is_connected():
-            cursor = connection.cursor(dictionary=True)
-            
-            days_in_range = (end_date - start_date).days + 1
-            if days_in_range < 1:
-                days_in_range = 1
-            
-            query = """
-                SELECT 
-                    HOUR(TimeOfEntry) as hour,
-                    COUNT(*) as occupancy_count
-                FROM occupancyhistory
-                WHERE TimeOfEntry >= %s 
-                    AND TimeOfEntry < %s
-                    AND CheckIfObjectIsCar = TRUE
-                    AND HOUR(TimeOfEntry) BETWEEN 7 AND 22
-                GROUP BY HOUR(TimeOfEntry)
-                ORDER BY hour
-            """
-            cursor.execute(query, (start_date, end_date + timedelta(days=1)))
+        # One row per business hour (7-22), zero-filled by the LEFT JOIN. The half-open
+        # TimeOfEntry range lets idx_time_car range-scan the history rows
+        query = """
+            WITH RECURSIVE business_hours (hour) AS (
+                SELECT 7
+                UNION ALL
+                SELECT hour + 1 FROM business_hours WHERE hour < 22
+            )
+            SELECT 
+                business_hours.hour,
+                COUNT(occupancyhistory.OccupancyID) / %s as avg_occupancy,
+                ROW_NUMBER() OVER (
+                    ORDER BY COUNT(occupancyhistory.OccupancyID) DESC, business_hours.hour
+                ) as peak_rank
+            FROM business_hours
+            LEFT JOIN occupancyhistory
+                ON HOUR(occupancyhistory.TimeOfEntry) = business_hours.hour
+                AND occupancyhistory.TimeOfEntry >= %s 
+                AND occupancyhistory.TimeOfEntry < %s
+                AND occupancyhistory.CheckIfObjectIsCar = TRUE
+            GROUP BY business_hours.hour
+            ORDER BY business_hours.hour
+        """
+        
+        with db_conn() as connection:
+            # Small aggregate: one buffered fetch of plain (hour, avg_occupancy, peak_rank) tuples
+            cursor = connection.cursor(buffered=True)
+            cursor.execute(query, (days_in_range, start_date, end_date + timedelta(days=1)))
             results = cursor.fetchall()
-            
             cursor.close()
-            connection.close()
-            
-            hours = list(range(7, 23))
-            occupancy_counts = [0] * len(hours)
-            
-            for row in results:
-                hour = row['hour']
-                count = row['occupancy_count']
-                hour_index = hour - 7  # Convert to index (0-15)
-                if 0 <= hour_index < len(hours):
-                    occupancy_counts[hour_index] = count / days_in_range
-            
-            return hours, occupancy_counts, None
+        
+        # Rows are already dense and ordered by hour
+        hours = [hour for hour, _, _ in results]
+        occupancy_counts = np.fromiter(
+            (avg_occupancy for _, avg_occupancy, _ in results), dtype=np.float64, count=len(results)
+        )
+        # Top 3 hours as ranked by SQL, only if they have actual data
+        peak_hours = [i for i, (_, avg_occupancy, peak_rank) in enumerate(results) if peak_rank <= 3 and avg_occupancy > 0]
+        
+        return hours, occupancy_counts, peak_hours, None
     
     except Error as error:
-        return None, None, f"Error de conexión a la base de datos: {str(error)}"
+        return None, None, None, f"Error de conexión a la base de datos: {str(error)}"
+
+
+def get_parking_metrics(connection):
+    """
+    Query the database for the number of parking spaces in each status.
+    Returns a dictionary with the parking metrics.
+    """
+    # Small aggregate: one buffered fetch of plain (Status, space_count) tuples
+    cursor = connection.cursor(buffered=True)
+    
+    # At most one row per status instead of one row per space
+    query = """
+        SELECT Status, COUNT(*) as space_count
+        FROM parkingspace
+        GROUP BY Status
+    """
+    cursor.execute(query)
+    # Counter returns 0 for statuses with no spaces
+    counts = Counter(dict(cursor.fetchall()))
+    cursor.close()
+    
+    total_spaces = sum(counts.values())
+    occupied = counts['occupied']
+    occupancy_rate = (occupied / total_spaces * 100) if total_spaces > 0 else 0
+    
+    return {
+        'total': total_spaces,
+        'available': counts['available'],
+        'occupied': occupied,
+        'obstacles': counts['obstacle'],
+        'occupancy_rate': occupancy_rate
+    }
+
+
+def get_parking_spaces(connection):
+    """
+    Query the database to get the current status of each parking space.
+    Returns the list of parking spaces.
+    """
+    cursor = connection.cursor(dictionary=True)
+    
+    query = """
+        SELECT ParkingSpaceID, SpaceCode, Status 
+        FROM parkingspace 
+        ORDER BY SpaceCode
+    """
+    cursor.execute(query)
+    spaces = cursor.fetchall()
+    cursor.close()
+    
+    return spaces
 
 
+@st.cache_data(ttl=PARKING_CACHE_TTL, show_spinner=False)
 def get_parking_data():
     """
-    Query the database to get current parking space status.
-    Returns a dictionary with parking space data and metrics.
+    Query the parking metrics and, if there are spaces, the per-space status
+    over a single pooled connection.
+    Returns the metrics, the list of parking spaces and an error message (None if successful).
     """
     try:
-        missing_configs = [k for k, v in DB_CONFIG.items() if not v]
-        if missing_configs:
-            return {
-                'spaces': [],
-                'metrics': {
-                    'total': 0,
-                    'available': 0,
-                    'occupied': 0,
-                    'obstacles': 0,
-                    'occupancy_rate': 0
-                },
-                'error': f"Configuración de base de datos faltante: {', '.join(missing_configs)}."
-            }
+        if CONFIG_ERROR:
+            return EMPTY_METRICS, [], CONFIG_ERROR
         
-        connection = mysql.connector.connect(**DB_CONFIG)
+        with db_conn() as connection:
+            metrics = get_parking_metrics(connection)
+            # Only fetch the per-space rows when there is a grid to render
+            spaces = get_parking_spaces(connection) if metrics['total'] > 0 else []
         
-        if connection.is_connected():
-            cursor = connection.cursor(dictionary=True)
-            
-            query = """
-                SELECT ParkingSpaceID, SpaceCode, Status 
-                FROM parkingspace 
-                ORDER BY SpaceCode
-            """
-            cursor.execute(query)
-            spaces = cursor.fetchall()
-            
-            total_spaces = len(spaces)
-            available = sum(1 for s in spaces if s['Status'] == 'available')
-            occupied = sum(1 for s in spaces if s['Status'] == 'occupied')
-            obstacles = sum(1 for s in spaces if s['Status'] == 'obstacle')
-            
-            occupancy_rate = (occupied / total_spaces * 100) if total_spaces > 0 else 0
-            
-            cursor.close()
-            connection.close()
-            
-            return {
-                'spaces': spaces,
-                'metrics': {
-                    'total': total_spaces,
-                    'available': available,
-                    'occupied': occupied,
-                    'obstacles': obstacles,
-                    'occupancy_rate': occupancy_rate
-                },
-                'error': None
-            }
+        return metrics, spaces, None
     
     except Error as error:
-        return {
-            'spaces': [],
-            'metrics': {
-                'total': 0,
-                'available': 0,
-                'occupied': 0,
-                'obstacles': 0,
-                'occupancy_rate': 0
-            },
-            'error': f"Error de conexión a la base de datos: {str(error)}"
-        }
-
-
-def display_parking_space_card(space_code, status):
+        return EMPTY_METRICS, [], f"Error de conexión a la base de datos: {str(error)}"
+
+
+def parking_space_card_html(space_code, status):
     """
-    Display a single parking space as a colored card.
+    Build the HTML for a single parking space as a colored card.
     """
-    status_info = {
-        'available': ('Disponible', 'available', '✅'),
-        'occupied': ('Ocupado', 'occupied', '🚗'),
-        'obstacle': ('Obstáculo', 'obstacle', '⚠️')
-    }
-    
-    display_text, css_class, icon = status_info.get(status, ('Desconocido', 'available', '❓'))
-    
-    st.markdown(f"""
-        <div class="parking-card {css_class}">
-            <div style="font-size: 2em;">{icon}</div>
-            <div style="font-size: 1.5em; margin: 10px 0;">{space_code}</div>
-            <div>{display_text}</div>
-        </div>
-    """, unsafe_allow_html=True)
+    display_text, css_class, icon = STATUS_INFO.get(status, UNKNOWN_STATUS_INFO)
+    return CARD_TMPL.format(css_class=css_class, icon=icon, space_code=space_code, display_text=display_text)
+
+
+@st.cache_resource
+def get_peak_hours_figure():
+    """
+    Create the peak hours figure once and reuse it for every chart render.
+    Returns the figure, its axes and a lock, since every session shares the same figure.
+    """
+    fig, ax = plt.subplots(figsize=(12, 5))
+    return fig, ax, Lock()
 
 
 def generate_peak_hours_chart(start_date, end_date, period_name="Esta Semana"):
     """
     Generate a matplotlib bar chart showing peak hours based on historical data.
     Only shows business hours (7 AM - 10 PM).
+    Draws on the shared cached figure: hold its lock until the figure has been rendered.
     """
-    hours, occupancy_counts, error = get_peak_hours_data(start_date, end_date)
+    hours, occupancy_counts, peak_hours, error = get_peak_hours_data(start_date, end_date)
     
     if error:
+        # Don't keep serving a failed query for the whole cache TTL
+        get_peak_hours_data.clear()
         return None, error
     
     if hours is None or occupancy_counts is None:
         return None, "No hay datos disponibles para mostrar."
     
-    fig, ax = plt.subplots(figsize=(12, 5))
+    fig, ax, _ = get_peak_hours_figure()
+    ax.cla()
     
     # Create bar chart
     bars = ax.bar(hours, occupancy_counts, color='#1f77b4', alpha=0.8, edgecolor='#155a8a', linewidth=1.5, label='Horas Normales')
     
     # Highlight peak hours (top 3)
-    if occupancy_counts and max(occupancy_counts) > 0:
-        sorted_indices = sorted(range(len(occupancy_counts)), key=lambda i: occupancy_counts[i], reverse=True)
-        peak_hours_shown = []
-        for i in sorted_indices[:3]:
-            if occupancy_counts[i] > 0:  # Only highlight if there's actual data
-                bars[i].set_color('#dc3545')
-                bars[i].set_alpha(0.9)
-                peak_hours_shown.append(i)
+    if peak_hours:
+        for i in peak_hours:
+            bars[i].set_color('#dc3545')
+            bars[i].set_alpha(0.9)
         
         # Add legend
-        if peak_hours_shown:
-            from matplotlib.patches import Patch
-            legend_elements = [
-                Patch(facecolor='#1f77b4', edgecolor='#155a8a', alpha=0.8, label='Horas Normales'),
-                Patch(facecolor='#dc3545', alpha=0.9, label='Top 3 Horas Pico')
-            ]
-            ax.legend(handles=legend_elements, loc='upper right', framealpha=0.9)
+        legend_elements = [
+            Patch(facecolor='#1f77b4', edgecolor='#155a8a', alpha=0.8, label='Horas Normales'),
+            Patch(facecolor='#dc3545', alpha=0.9, label='Top 3 Horas Pico')
+        ]
+        ax.legend(handles=legend_elements, loc='upper right', framealpha=0.9)
     
     ax.set_xlabel('Hora del Día', fontsize=12, fontweight='bold')
     ax.set_ylabel('Promedio de Espacios Ocupados', fontsize=12, fontweight='bold')
@@ -267,28 +371,26 @@ def generate_peak_hours_chart(start_date, end_date, period_name="Esta Semana"):
     ax.grid(axis='y', alpha=0.3, linestyle='--')
     ax.set_ylim(bottom=0)
     
-    for i, (hour, count) in enumerate(zip(hours, occupancy_counts)):
-        if count > 0:
-            ax.text(hour, count, f'{count:.1f}', ha='center', va='bottom', fontsize=8)
+    for i in np.flatnonzero(occupancy_counts > 0):
+        ax.text(hours[i], occupancy_counts[i], f'{occupancy_counts[i]:.1f}', ha='center', va='bottom', fontsize=8)
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     return fig, None
 
 
-def main():
-    st.markdown('<h1 class="main-title">¡Bienvenido a Plaza Iglesias!</h1>', unsafe_allow_html=True)
-    st.markdown("---")
-    
-    data = get_parking_data()
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def live_status():
+    """
+    Render the live metrics and parking space cards.
+    Re-runs on its own every few seconds without rebuilding the rest of the page.
+    """
+    metrics, spaces, error = get_parking_data()
     
-    if data['error']:
-        st.error(f"Error de Conexión a la Base de Datos: {data['error']}")
+    if error:
+        st.error(f"Error de Conexión a la Base de Datos: {error}")
         return
     
-    metrics = data['metrics']
-    spaces = data['spaces']
-    
     st.markdown('<div class="section-header"> Estado en Tiempo Real</div>', unsafe_allow_html=True)
     
     col1, col2, col3, col4 = st.columns(4)
@@ -326,22 +428,37 @@ def main():
     st.markdown('<div class="section-header">🅿️ Espacios de Estacionamiento</div>', unsafe_allow_html=True)
     
     if spaces:
+        # All cards go out in one markdown element laid out by the .parking-grid CSS grid
         cols_per_row = 4
+        cards = []
         for row_idx, i in enumerate(range(0, len(spaces), cols_per_row)):
-            cols = st.columns(cols_per_row)
             row_spaces = spaces[i:i+cols_per_row]
             # Reverse the second row (row_idx == 1)
             if row_idx == 1:
-                row_spaces = list(reversed(row_spaces))
+                row_spaces = row_spaces[::-1]
             
-            for j, col in enumerate(cols):
-                if j < len(row_spaces):
-                    space = row_spaces[j]
-                    with col:
-                        display_parking_space_card(space['SpaceCode'], space['Status'])
+            cards.extend(parking_space_card_html(space['SpaceCode'], space['Status']) for space in row_spaces)
+        
+        st.markdown(f'<div class="parking-grid">{"".join(cards)}\n</div>', unsafe_allow_html=True)
     else:
         st.warning("No se encontraron espacios de estacionamiento en la base de datos.")
     
+    current_time = time.strftime("%Y-%m-%d %H:%M:%S")
+    st.markdown(f"<div style='text-align: center; color: #666;'>Última actualización: {current_time}</div>", unsafe_allow_html=True)
+
+
+def main():
+    inject_css()
+    st.markdown('<h1 class="main-title">¡Bienvenido a Plaza Iglesias!</h1>', unsafe_allow_html=True)
+    st.markdown("---")
+    
+    if st.button("Refrescar"):
+        get_parking_data.clear()
+        get_peak_hours_data.clear()
+        st.session_state.pop('chart_key', None)
+    
+    live_status()
+    
     st.markdown("---")
     
     # Peak Hours Chart
@@ -408,13 +525,25 @@ def main():
         unsafe_allow_html=True
     )
     
-    fig, chart_error = generate_peak_hours_chart(start_date, end_date, period_name)
+    # Only re-render when the filters change (or the peak hours cache expires);
+    # otherwise re-display the PNG rendered for this session last time
+    chart_key = (start_date, end_date, period_name, int(time.time() // PEAK_HOURS_CACHE_TTL))
+    chart_error = None
+    if st.session_state.get('chart_key') != chart_key:
+        _, _, chart_lock = get_peak_hours_figure()
+        with chart_lock:
+            fig, chart_error = generate_peak_hours_chart(start_date, end_date, period_name)
+            if fig:
+                buf = io.BytesIO()
+                # Small PNG for st.image instead of sending the figure through st.pyplot
+                fig.savefig(buf, format='png', dpi=CHART_DPI, bbox_inches='tight')
+                st.session_state['chart_png'] = buf.getvalue()
+                st.session_state['chart_key'] = chart_key
     
     if chart_error:
         st.warning(f"No se pudo generar el gráfico de horas pico: {chart_error}")
-    elif fig:
-        st.pyplot(fig)
-        plt.close(fig)
+    elif st.session_state.get('chart_key') == chart_key:
+        st.image(st.session_state['chart_png'])
         st.markdown(
             "<div style='text-align: center; color: #666; font-size: 0.9em;'>"
             "Horario de negocio: 7:00 AM - 10:00 PM. Las barras rojas indican las 3 horas con mayor ocupación promedio."
@@ -423,13 +552,6 @@ def main():
         )
     else:
         st.info("No hay suficientes datos históricos para generar el gráfico.")
-    
-    st.markdown("---")
-    current_time = time.strftime("%Y-%m-%d %H:%M:%S")
-    st.markdown(f"<div style='text-align: center; color: #666;'>Última actualización: {current_time}</div>", unsafe_allow_html=True)
-    
-    time.sleep(1)
-    st.rerun()
 
 
 if __name__ == "__main__":